@@ -1,18 +1,70 @@
 import os
+import re
 import json
-from openai import OpenAI
-from typing import Optional, Dict
+import copy
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Dict
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+MAX_MESSAGE_LENGTH = 1000
+PARSE_CACHE_SIZE = 4096
+PERPLEXITY_TIMEOUT_SECONDS = 10.0
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_json_decoder = json.JSONDecoder()
+
+# Trivial phrasings resolved locally, without a Perplexity round-trip
+_TRIVIAL_INTENTS = [
+    (re.compile(r'^(?:check\s+|show\s+|get\s+|what\s+is\s+)?(?:my\s+)?(?:wallet\s+)?balance\??$'), 'balance'),
+    (re.compile(r'^(?:please\s+)?(?:create|make|generate)\s+(?:me\s+)?(?:a\s+)?(?:new\s+)?wallet$'), 'create_wallet'),
+    (re.compile(r'^(?:please\s+)?disconnect(?:\s+my)?(?:\s+wallet)?$'), 'disconnect'),
+    (re.compile(r'^(?:please\s+)?(?:i\s+want\s+to\s+)?connect\s+(?:my\s+|a\s+|an\s+)?(?:existing\s+)?wallet$'), 'connect_wallet'),
+]
+
+def normalize_input(user_input: str) -> str:
+    """Trim and collapse whitespace so equivalent phrasings share a cache entry.
+    Case is kept: addresses are base32 upper-case and NFT names are user-chosen."""
+    return _WHITESPACE_RE.sub(' ', user_input.strip())[:MAX_MESSAGE_LENGTH]
+
+def match_trivial_intent(user_input: str) -> Optional[Dict]:
+    """Return the intent for fixed phrasings like 'check my balance', or None"""
+    lowered = normalize_input(user_input).lower()
+    for pattern, intent in _TRIVIAL_INTENTS:
+        if pattern.match(lowered):
+            return {"intent": intent, "parameters": {}}
+    return None
 
 class AIIntentParser:
-    def __init__(self):
-        self.api_key = os.getenv("PERPLEXITY_API_KEY")
-        if not self.api_key:
-            raise ValueError("PERPLEXITY_API_KEY not found in environment variables")
-            
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url="https://api.perplexity.ai"
-        )  # Fixed: Added missing closing parenthesis
+    def __init__(self, client: Optional["AsyncOpenAI"] = None):
+        if client is None:
+            self.api_key = os.getenv("PERPLEXITY_API_KEY")
+            if not self.api_key:
+                raise ValueError("PERPLEXITY_API_KEY not found in environment variables")
+
+            # Deferred so the bot starts without paying for the openai/httpx imports
+            import httpx
+            from openai import AsyncOpenAI
+
+            # One multiplexed HTTP/2 connection is shared by concurrent user requests
+            self._http_client = httpx.AsyncClient(
+                http2=True,
+                timeout=PERPLEXITY_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+            )
+            client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url="https://api.perplexity.ai",
+                http_client=self._http_client
+            )
+
+        # Single client per parser so its HTTP connection pool is reused
+        self.client = client
+        self._cache = OrderedDict()
         
         self.system_prompt = """Analyze Algorand-related requests and return JSON with:
 {
@@ -105,26 +157,58 @@ User: "Send NFT 123 to ADDRESS"
 User: "Transfer NFT 456 to ADDRESS1 and ADDRESS2"
 {"intent": "send_nft_multi", "parameters": {"asset_id": 456, "recipients": ["ADDRESS1", "ADDRESS2"]}}"""
 
-    def parse(self, user_input: str) -> Optional[Dict]:
-        try:
-            response = self.client.chat.completions.create(
-                model="sonar-pro",
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": user_input}
-                ],
-                temperature=0.1,
-                max_tokens=200
-            )  # Fixed: Added missing closing parenthesis
-            return self._extract_json(response.choices[0].message.content)
-        except Exception as e:
-            print(f"AI Parsing Error: {e}")
+    async def parse(self, user_input: str) -> Optional[Dict]:
+        trivial = match_trivial_intent(user_input)
+        if trivial:
+            return trivial
+
+        normalized = normalize_input(user_input)
+        result = self._cache.get(normalized)
+        if result is None:
+            try:
+                result = await self._complete(normalized)
+            except Exception as e:
+                logger.warning("AI parsing failed: %s", e)
+                return None
+            if result is None:
+                # Unparseable reply: answer "unknown" but retry the phrasing next time
+                return {"intent": "unknown"}
+            self._cache[normalized] = result
+            if len(self._cache) > PARSE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(normalized)
+
+        # Callers mutate the returned parameters, so hand out a copy
+        return copy.deepcopy(result)
+
+    async def _complete(self, normalized_input: str) -> Optional[Dict]:
+        """Ask Perplexity for the intent; exceptions propagate and None marks an
+        unparseable reply, so neither failure is cached"""
+        response = await self.client.chat.completions.create(
+            model="sonar-pro",
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": normalized_input}
+            ],
+            temperature=0.1,
+            max_tokens=200
+        )
+        return self._extract_json(response.choices[0].message.content)
+
+    def _extract_json(self, text: str) -> Optional[Dict]:
+        """Return the first JSON object in the reply, or None if there is none"""
+        start = text.find('{') if text else -1
+        if start < 0:
+            logger.warning("LLM response contained no JSON object")
             return None
-
-    def _extract_json(self, text: str) -> Dict:
         try:
-            start = text.find('{')
-            end = text.rfind('}') + 1
-            return json.loads(text[start:end])
-        except:
-            return {"intent": "unknown"}
+            # Decode the first object and ignore any trailing commentary
+            parsed, _ = _json_decoder.raw_decode(text, start)
+        except json.JSONDecodeError as e:
+            logger.warning("LLM JSON parse failed: %s", e)
+            return None
+        if not isinstance(parsed, dict):
+            logger.warning("LLM JSON was not an object")
+            return None
+        return parsed
@@ -1,9 +1,16 @@
 import os
+import asyncio
+import copy
 import json
 import logging
+import queue
 import re
 import time
+import threading
+from bisect import bisect_left
+from functools import lru_cache
 from datetime import datetime, timedelta
+from logging.handlers import QueueHandler, QueueListener
 from telegram import Update, MessageEntity
 from telegram.ext import (
     ApplicationBuilder,
@@ -13,7 +20,7 @@ from telegram.ext import (
     CallbackContext,
     ConversationHandler
 )
-from ai_intent import AIIntentParser
+from ai_intent import AIIntentParser, match_trivial_intent
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardRemove, ReplyKeyboardMarkup
 from wallet import create_wallet, connect_wallet, sign_transaction
 from transaction_builder import build_and_send_transaction, build_and_send_multi_transaction, create_nft, send_nft, send_nft_multi, opt_in_to_asset, opt_out_of_asset, confirm_and_get_asset_id
@@ -21,12 +28,22 @@ from utils import get_algod_client, generate_unit_name
 import tempfile
 from ipfs_utils import upload_to_ipfs
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 
 # Configuration
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 SESSIONS_FILE = "telegram_sessions.json"
+ACTIVITY_FILE = "telegram_activity.json"
+RATE_LIMIT_FILE = "telegram_rate_limits.json"
 SECURITY_LOG_FILE = "security_events.log"
+REDIS_URL = os.getenv("REDIS_URL")
+REDIS_SESSION_PREFIX = "session:"
+REDIS_RATE_LIMIT_PREFIX = "rl:tx:"
 
 # Conversation states
 PASSWORD, MNEMONIC, PASSWORD_FOR_CONNECT, TRANSACTION_PASSWORD, IMAGE_HANDLING = range(5)
@@ -36,17 +53,72 @@ MAX_MESSAGE_LENGTH = 1000
 MAX_PASSWORD_ATTEMPTS = 3
 SESSION_TIMEOUT_HOURS = 24
 MAX_TRANSACTIONS_PER_HOUR = 10
+SESSION_TTL_SECONDS = SESSION_TIMEOUT_HOURS * 3600
+SESSION_FLUSH_INTERVAL_SECONDS = 5
+RATE_LIMIT_WINDOW_SECONDS = 3600
 WALLET_CONNECTION = "WALLET_CONNECTION"
 CREATING_WALLET = "CREATING_WALLET"
+HELP_MESSAGE = (
+    "❌ I didn't understand that command.\n\n"
+    "Try:\n"
+    "• 'Create a new wallet'\n"
+    "• 'Send 5 ALGO to [ADDRESS]'\n"
+    "• 'Create NFT named Dragon'\n"
+    "• 'Check my balance'"
+)
+
+# Precompiled patterns for input sanitization and fallback parsing
+_CTRL_TABLE = dict.fromkeys([*range(0x00, 0x20), *range(0x7f, 0xa0)])
+_DANGEROUS_RE = re.compile(
+    r'<script.*?</script>|javascript:|data:|vbscript:|onload=|onerror=|eval\(|exec\(',
+    re.IGNORECASE | re.DOTALL
+)
+_B32_ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567'
+_NFT_PATTERNS = [
+    # "create 10 nfts name cool style"
+    re.compile(r"(?i)create\s+(\d+)\s+nfts?\s+name\s+([a-zA-Z0-9\s]{1,50})"),
+    # "create nft name cool style, 10 only"
+    re.compile(r"(?i)create\s+nft\s+name\s+([a-zA-Z0-9\s]{1,50})[, ]+(\d+)\s*(?:only)?"),
+    # "create nft named X with supply Y"
+    re.compile(r"(?i)create\s+nft\s+(?:named|called)?\s*([a-zA-Z0-9\s]{1,50})(?:\s+with\s+supply\s+(\d+))?"),
+]
+_SEND_PATTERN = re.compile(r"(?i)(send|transfer|pay)\s+(?P<amount>[\d\.]{1,20}|\w+(?:\s+\w+)*)\s+(?:algo|algos)\s+to\s+(?P<address>[A-Z2-7]{58})")
+# Names swallowing these words likely hide a description/supply clause the AI should parse
+_NFT_NAME_CLAUSE_RE = re.compile(r'(?i)\b(?:with|and|description|supply)\b')
+# A bare "create nft named" captures the keyword itself as the name
+_NFT_NAME_KEYWORDS = frozenset({'name', 'named', 'called'})
+_OPT_IN_PATTERNS = [
+    re.compile(r"(?i)opt\s*in\s+(?:to\s+|for\s+|)(?:nft\s+|asset\s+|asset\s+id\s+|the\s+asset\s+|)(\d+)"),
+    re.compile(r"(?i)opt\s*in\s+(\d+)"),
+]
+_OPT_OUT_PATTERNS = [
+    re.compile(r"(?i)opt\s*out\s+(?:of\s+|from\s+|for\s+|)(?:nft\s+|asset\s+|asset\s+id\s+|the\s+asset\s+|)(\d+)"),
+    re.compile(r"(?i)opt\s*out\s+(\d+)"),
+]
+# Messages sharing no word with this set cannot carry a supported intent
+_WORD_RE = re.compile(r'[a-z]+')
+_INTENT_KEYWORDS = frozenset({
+    'algo', 'algos', 'algorand', 'wallet', 'wallets', 'nft', 'nfts', 'asset', 'assets',
+    'balance', 'send', 'transfer', 'pay', 'mint', 'create', 'make', 'generate',
+    'connect', 'disconnect', 'mnemonic', 'opt', 'optin', 'optout',
+})
 
 # Set up comprehensive logging
+# Loggers only enqueue records; QueueListener threads started in main() do the
+# file/console writes so handlers never block the event loop on disk IO
+log_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+log_file_handler = logging.FileHandler("bot.log")
+log_file_handler.setFormatter(log_formatter)
+log_stream_handler = logging.StreamHandler()
+log_stream_handler.setFormatter(log_formatter)
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, log_file_handler, log_stream_handler)
+
+# The queue handler only renders the message; the listener's handlers add the prefix
 logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    format="%(message)s",
     level=logging.INFO,
-    handlers=[
-        logging.FileHandler("bot.log"),
-        logging.StreamHandler()
-    ]
+    handlers=[QueueHandler(log_queue)]
 )
 logger = logging.getLogger(__name__)
 
@@ -54,9 +126,36 @@ logger = logging.getLogger(__name__)
 security_logger = logging.getLogger("security")
 security_handler = logging.FileHandler(SECURITY_LOG_FILE)
 security_handler.setFormatter(logging.Formatter("%(asctime)s - SECURITY - %(message)s"))
-security_logger.addHandler(security_handler)
+security_log_queue = queue.SimpleQueue()
+security_log_listener = QueueListener(security_log_queue, security_handler)
+security_logger.addHandler(QueueHandler(security_log_queue))
 security_logger.setLevel(logging.INFO)
 
+# Trim, count and record in one atomic step so concurrent bot processes cannot
+# both slip under the limit. Returns the count when over the limit, otherwise -1.
+_RATE_LIMIT_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return -1 end
+redis.call('ZREMRANGEBYSCORE', KEYS[2], 0, ARGV[2])
+local count = redis.call('ZCARD', KEYS[2])
+if count >= tonumber(ARGV[3]) then return count end
+redis.call('ZADD', KEYS[2], ARGV[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return -1
+"""
+
+# Sessions live in Redis when REDIS_URL is set, otherwise in the JSON files above
+redis_client = None
+if REDIS_URL:
+    try:
+        import redis
+    except ImportError:
+        raise ImportError("redis is required when REDIS_URL is set. Install with: pip install redis")
+    redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    rate_limit_script = redis_client.register_script(_RATE_LIMIT_LUA)
+
+# File-backed sessions are kept in memory and flushed periodically by a job
+_sessions_lock = threading.RLock()
+
 async def delete_message_safely(update: Update, context: CallbackContext):
     """Safely delete a message without raising exceptions"""
     try:
@@ -71,31 +170,33 @@ def log_security_event(user_id, event_type, details=""):
     """Log security-related events"""
     security_logger.info(f"User {user_id} - {event_type} - {details}")
 
+@lru_cache(maxsize=1)
+def get_intent_parser():
+    """Return the process-wide AI intent parser (built on first use)"""
+    return AIIntentParser()
+
+class SanitizedStr(str):
+    """A string that has already been through sanitize_input"""
+    __slots__ = ()
+
 def sanitize_input(text):
     """Sanitize user input to prevent injection attacks"""
     if not text or not isinstance(text, str):
         return ""
     
+    if isinstance(text, SanitizedStr):
+        return text
+    
     # Remove control characters and limit length
-    sanitized = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
-    sanitized = sanitized[:MAX_MESSAGE_LENGTH]
-    
-    # Remove potentially dangerous patterns
-    dangerous_patterns = [
-        r'<script.*?</script>',
-        r'javascript:',
-        r'data:',
-        r'vbscript:',
-        r'onload=',
-        r'onerror=',
-        r'eval\(',
-        r'exec\(',
-    ]
+    sanitized = text.translate(_CTRL_TABLE)[:MAX_MESSAGE_LENGTH]
     
-    for pattern in dangerous_patterns:
-        sanitized = re.sub(pattern, '', sanitized, flags=re.IGNORECASE)
+    # Remove potentially dangerous patterns; repeat because a removal can join
+    # fragments into a new match (e.g. "java<script></script>script:")
+    removed = 1
+    while removed:
+        sanitized, removed = _DANGEROUS_RE.subn('', sanitized)
     
-    return sanitized.strip()
+    return SanitizedStr(sanitized.strip())
 
 def validate_algorand_address(address):
     """Validate Algorand address format with additional security checks"""
@@ -106,96 +207,229 @@ def validate_algorand_address(address):
     if len(address) != 58:
         return False
     
-    # Check for valid base32 characters
-    if not re.match(r'^[A-Z2-7]{58}$', address):
+    # Check for valid base32 characters before paying for the checksum;
+    # deleting every allowed byte must leave nothing behind
+    if not address.isascii() or address.encode().translate(None, _B32_ALPHABET):
         return False
     
-    return True
+    # Decode and verify the SHA-512/256 checksum of the public key
+    from algosdk.encoding import is_valid_address
+    return is_valid_address(address)
+
+def _session_key(user_id):
+    return f"{REDIS_SESSION_PREFIX}{user_id}"
+
+def _rate_limit_key(user_id):
+    return f"{REDIS_RATE_LIMIT_PREFIX}{user_id}"
 
 def check_user_rate_limit(user_id, action_type="general"):
     """Check if user is within rate limits"""
-    sessions = load_sessions()
-    user_key = str(user_id)
-    current_time = datetime.now()
-    
-    if user_key not in sessions:
+    # Only transactions are rate limited
+    if action_type != "transaction":
         return True
+
+    if redis_client is not None:
+        now = time.time()
+        tx_count = rate_limit_script(
+            keys=[_session_key(user_id), _rate_limit_key(user_id)],
+            args=[repr(now), now - RATE_LIMIT_WINDOW_SECONDS, MAX_TRANSACTIONS_PER_HOUR, RATE_LIMIT_WINDOW_SECONDS]
+        )
+        if tx_count >= 0:
+            log_security_event(user_id, "RATE_LIMIT_EXCEEDED", f"Transaction limit: {tx_count}")
+            return False
+        return True
+
+    now = time.time()
     
-    user_session = sessions[user_key]
-    
-    # Check transaction rate limit
-    if action_type == "transaction":
-        recent_transactions = user_session.get('recent_transactions', [])
-        # Remove transactions older than 1 hour
-        recent_transactions = [
-            tx_time for tx_time in recent_transactions 
-            if datetime.fromisoformat(tx_time) > current_time - timedelta(hours=1)
-        ]
+    with _sessions_lock:
+        wallets, _, rate_limits = _session_tables()
+        if user_id not in wallets.data:
+            return True
+        
+        recent_transactions = _tx_timestamps(rate_limits.data.get(user_id, []))
+        # Timestamps are appended in order, so expired ones form a prefix
+        del recent_transactions[:bisect_left(recent_transactions, now - RATE_LIMIT_WINDOW_SECONDS)]
         
         if len(recent_transactions) >= MAX_TRANSACTIONS_PER_HOUR:
             log_security_event(user_id, "RATE_LIMIT_EXCEEDED", f"Transaction limit: {len(recent_transactions)}")
             return False
         
         # Add current transaction
-        recent_transactions.append(current_time.isoformat())
-        user_session['recent_transactions'] = recent_transactions
-        sessions[user_key] = user_session
-        save_sessions(sessions)
+        recent_transactions.append(now)
+        rate_limits.data[user_id] = recent_transactions
+        rate_limits.dirty = True
     
     return True
 
+def _tx_timestamps(recent_transactions):
+    """Return rate-limit entries as unix timestamps, migrating legacy ISO strings"""
+    if recent_transactions and isinstance(recent_transactions[0], str):
+        return sorted(datetime.fromisoformat(tx_time).timestamp() for tx_time in recent_transactions)
+    return recent_transactions
+
 def validate_session(user_id):
     """Validate user session and check for expiry"""
-    sessions = load_sessions()
-    user_key = str(user_id)
-    
-    if user_key not in sessions:
-        return False
-    
-    user_session = sessions[user_key]
-    
-    # Check session expiry
-    if 'last_activity' in user_session:
-        last_activity = datetime.fromisoformat(user_session['last_activity'])
-        if datetime.now() - last_activity > timedelta(hours=SESSION_TIMEOUT_HOURS):
-            log_security_event(user_id, "SESSION_EXPIRED")
-            del sessions[user_key]
-            save_sessions(sessions)
+    if redis_client is not None:
+        # Expired sessions are evicted by Redis; refreshing the TTL marks activity
+        return bool(redis_client.expire(_session_key(user_id), SESSION_TTL_SECONDS))
+
+    with _sessions_lock:
+        wallets, activity, _ = _session_tables()
+        if user_id not in wallets.data:
             return False
-    
-    # Update last activity
-    user_session['last_activity'] = datetime.now().isoformat()
-    sessions[user_key] = user_session
-    save_sessions(sessions)
+        
+        # Check session expiry
+        if user_id in activity.data:
+            last_activity = datetime.fromisoformat(activity.data[user_id])
+            if datetime.now() - last_activity > timedelta(hours=SESSION_TIMEOUT_HOURS):
+                log_security_event(user_id, "SESSION_EXPIRED")
+                _remove_file_session(user_id)
+                return False
+        
+        # Update last activity
+        activity.data[user_id] = datetime.now().isoformat()
+        activity.dirty = True
     
     return True
 
-def load_sessions():
+async def run_session_store(func, *args):
+    """Call a session helper, off the event loop when it round-trips to Redis"""
+    if redis_client is None:
+        return func(*args)
+    return await asyncio.to_thread(func, *args)
+
+def get_user_session(user_id):
+    """Return the stored session for a user, or None if there is none"""
+    if redis_client is not None:
+        return redis_client.hgetall(_session_key(user_id)) or None
+    with _sessions_lock:
+        return _session_tables()[0].data.get(user_id)
+
+def set_user_session(user_id, session):
+    """Create or replace the stored session for a user"""
+    if redis_client is not None:
+        session_key = _session_key(user_id)
+        pipe = redis_client.pipeline()
+        pipe.delete(session_key)
+        pipe.hset(session_key, mapping=session)
+        pipe.expire(session_key, SESSION_TTL_SECONDS)
+        pipe.execute()
+        return
+
+    wallet_session = dict(session)
+    last_activity = wallet_session.pop('last_activity', None) or datetime.now().isoformat()
+    with _sessions_lock:
+        wallets, activity, _ = _session_tables()
+        wallets.data[user_id] = wallet_session
+        wallets.dirty = True
+        activity.data[user_id] = last_activity
+        activity.dirty = True
+
+def delete_user_session(user_id):
+    """Remove a user's session; returns True if one existed"""
+    if redis_client is not None:
+        return bool(redis_client.delete(_session_key(user_id), _rate_limit_key(user_id)))
+
+    with _sessions_lock:
+        return _remove_file_session(user_id)
+
+class SessionTable:
+    """One concern of the file-backed session store, cached in memory.
+    Keyed by the integer Telegram user id; keys are strings only on disk."""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {int(user_id): value for user_id, value in load_sessions(path).items()}
+        self.dirty = False
+
+    def snapshot(self):
+        """Copy the table in its on-disk form and mark it clean; call under _sessions_lock"""
+        self.dirty = False
+        return {str(user_id): copy.copy(value) for user_id, value in self.data.items()}
+
+# Wallet data, last activity and rate-limit history are stored separately so
+# per-message updates never rewrite the file holding encrypted mnemonics
+_tables = None
+
+def _session_tables():
+    """Return the (wallets, activity, rate_limits) tables, loading them on first use"""
+    global _tables
+    with _sessions_lock:
+        if _tables is None:
+            wallets = SessionTable(SESSIONS_FILE)
+            activity = SessionTable(ACTIVITY_FILE)
+            rate_limits = SessionTable(RATE_LIMIT_FILE)
+            # Move fields from the old combined session format into their own tables
+            for user_id, wallet_session in wallets.data.items():
+                if 'last_activity' in wallet_session:
+                    activity.data.setdefault(user_id, wallet_session.pop('last_activity'))
+                    wallets.dirty = activity.dirty = True
+                if 'recent_transactions' in wallet_session:
+                    rate_limits.data.setdefault(user_id, wallet_session.pop('recent_transactions'))
+                    wallets.dirty = rate_limits.dirty = True
+            _tables = (wallets, activity, rate_limits)
+        return _tables
+
+def _remove_file_session(user_id):
+    """Drop a user from every table; returns True if they had a wallet session"""
+    wallets, activity, rate_limits = _session_tables()
+    existed = wallets.data.pop(user_id, None) is not None
+    for table in (wallets, activity, rate_limits):
+        table.dirty = True
+    activity.data.pop(user_id, None)
+    rate_limits.data.pop(user_id, None)
+    return existed
+
+# Held from snapshot to write so an older snapshot never overwrites a newer one
+_flush_lock = threading.Lock()
+
+def flush_sessions():
+    """Write every session table that changed since the last flush"""
+    with _flush_lock:
+        # Only the copy is taken under the session lock; handlers are not
+        # held up while the files are written
+        with _sessions_lock:
+            if _tables is None:
+                return
+            snapshots = [(table.path, table.snapshot()) for table in _tables if table.dirty]
+        for path, sessions in snapshots:
+            save_sessions(sessions, path)
+
+async def flush_sessions_job(context: CallbackContext):
+    """Periodic job persisting session changes made since the last run"""
+    await asyncio.to_thread(flush_sessions)
+
+def load_sessions(path=SESSIONS_FILE):
     """Load user sessions with error handling"""
     try:
-        if os.path.exists(SESSIONS_FILE):
-            with open(SESSIONS_FILE, 'r') as f:
-                return json.load(f)
-    except (json.JSONDecodeError, IOError) as e:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            return orjson.loads(data) if orjson else json.loads(data)
+    except (ValueError, IOError) as e:
         logger.error(f"Failed to load sessions: {e}")
         # Backup corrupted file
-        if os.path.exists(SESSIONS_FILE):
-            backup_name = f"{SESSIONS_FILE}.backup.{int(time.time())}"
-            os.rename(SESSIONS_FILE, backup_name)
+        if os.path.exists(path):
+            backup_name = f"{path}.backup.{int(time.time())}"
+            os.rename(path, backup_name)
             logger.info(f"Corrupted sessions file backed up as {backup_name}")
     
     return {}
 
-def save_sessions(sessions):
+def save_sessions(sessions, path=SESSIONS_FILE):
     """Save user sessions securely"""
     try:
         # Write to temporary file first
-        temp_file = f"{SESSIONS_FILE}.tmp"
-        with open(temp_file, 'w') as f:
-            json.dump(sessions, f)
+        temp_file = f"{path}.tmp"
+        if orjson:
+            data = orjson.dumps(sessions)
+        else:
+            data = json.dumps(sessions).encode()
+        with open(temp_file, 'wb') as f:
+            f.write(data)
         
         # Atomically replace the original file
-        os.replace(temp_file, SESSIONS_FILE)
+        os.replace(temp_file, path)
     except IOError as e:
         logger.error(f"Failed to save sessions: {e}")
 
@@ -205,12 +439,13 @@ def parse_nft_command_fallback(text):
     if not text:
         return None
 
+    create_n_named, create_named_n, create_named = _NFT_PATTERNS
+
     # Pattern: "create 10 nfts name cool style"
-    pattern1 = r"(?i)create\s+(\d+)\s+nfts?\s+name\s+([a-zA-Z0-9\s]{1,50})"
-    match1 = re.search(pattern1, text)
+    match1 = create_n_named.search(text)
     if match1:
         supply = int(match1.group(1))
-        name = match1.group(2).strip()
+        name = SanitizedStr(match1.group(2).strip())
         return {
             'intent': 'create_nft',
             'parameters': {
@@ -220,10 +455,9 @@ def parse_nft_command_fallback(text):
         }
 
     # Pattern: "create nft name cool style, 10 only"
-    pattern2 = r"(?i)create\s+nft\s+name\s+([a-zA-Z0-9\s]{1,50})[, ]+(\d+)\s*(?:only)?"
-    match2 = re.search(pattern2, text)
+    match2 = create_named_n.search(text)
     if match2:
-        name = match2.group(1).strip()
+        name = SanitizedStr(match2.group(1).strip())
         supply = int(match2.group(2))
         return {
             'intent': 'create_nft',
@@ -234,10 +468,9 @@ def parse_nft_command_fallback(text):
         }
 
     # Existing patterns for "create nft named X with supply Y"
-    pattern3 = r"(?i)create\s+nft\s+(?:named|called)?\s*([a-zA-Z0-9\s]{1,50})(?:\s+with\s+supply\s+(\d+))?"
-    match3 = re.search(pattern3, text)
+    match3 = create_named.search(text)
     if match3:
-        name = match3.group(1).strip()
+        name = SanitizedStr(match3.group(1).strip())
         supply = int(match3.group(2)) if match3.group(2) else 1
         return {
             'intent': 'create_nft',
@@ -256,36 +489,39 @@ def parse_send_command_fallback(text):
     if not text:
         return None
     
-    pattern = r"(?i)(send|transfer|pay)\s+(?P<amount>[\d\.]{1,20}|\w+(?:\s+\w+)*)\s+(?:algo|algos)\s+to\s+(?P<address>[A-Z2-7]{58})"
-    match = re.search(pattern, text)
-    
+    match = _SEND_PATTERN.search(text)
     if match:
-        amount_text = sanitize_input(match.group('amount'))
-        address = sanitize_input(match.group('address'))
-        
-        # Validate address
-        if not validate_algorand_address(address):
+        return _send_intent_from_match(match)
+    return None
+
+def _send_intent_from_match(match):
+    """Build a send_algo intent from a _SEND_PATTERN match, or None if the amount or address is invalid"""
+    # Groups of already-sanitized text need no second pass
+    amount_text = match.group('amount')
+    address = match.group('address')
+    
+    # Validate address
+    if not validate_algorand_address(address):
+        return None
+    
+    # Convert and validate amount
+    try:
+        amount = float(amount_text)
+        if amount <= 0 or amount > 1000000:  # Reasonable limits
             return None
-        
-        # Convert and validate amount
-        try:
-            amount = float(amount_text)
-            if amount <= 0 or amount > 1000000:  # Reasonable limits
-                return None
-        except ValueError:
-            from utils import text_to_number
-            amount = text_to_number(amount_text)
-            if amount is None or amount <= 0 or amount > 1000000:
-                return None
-        
-        return {
-            'intent': 'send_algo',
-            'parameters': {
-                'amount': amount,
-                'recipient': address
-            }
+    except ValueError:
+        from utils import text_to_number
+        amount = text_to_number(amount_text)
+        if amount is None or amount <= 0 or amount > 1000000:
+            return None
+    
+    return {
+        'intent': 'send_algo',
+        'parameters': {
+            'amount': amount,
+            'recipient': address
         }
-    return None
+    }
 
 def parse_opt_command_fallback(text):
     """Enhanced fallback parser for opt-in/opt-out commands"""
@@ -293,21 +529,9 @@ def parse_opt_command_fallback(text):
     if not text:
         return None
     
-    # Patterns for opt-in
-    opt_in_patterns = [
-        r"(?i)opt\s*in\s+(?:to\s+|for\s+|)(?:nft\s+|asset\s+|asset\s+id\s+|the\s+asset\s+|)(\d+)",
-        r"(?i)opt\s*in\s+(\d+)",
-    ]
-    
-    # Patterns for opt-out  
-    opt_out_patterns = [
-        r"(?i)opt\s*out\s+(?:of\s+|from\s+|for\s+|)(?:nft\s+|asset\s+|asset\s+id\s+|the\s+asset\s+|)(\d+)",
-        r"(?i)opt\s*out\s+(\d+)",
-    ]
-    
     # Check opt-in patterns
-    for pattern in opt_in_patterns:
-        match = re.search(pattern, text)
+    for pattern in _OPT_IN_PATTERNS:
+        match = pattern.search(text)
         if match:
             return {
                 'intent': 'opt_in',
@@ -317,8 +541,8 @@ def parse_opt_command_fallback(text):
             }
     
     # Check opt-out patterns
-    for pattern in opt_out_patterns:
-        match = re.search(pattern, text)
+    for pattern in _OPT_OUT_PATTERNS:
+        match = pattern.search(text)
         if match:
             return {
                 'intent': 'opt_out',
@@ -329,6 +553,38 @@ def parse_opt_command_fallback(text):
     
     return None
 
+def fast_parse(text):
+    """Resolve unambiguous commands locally so only free-form text reaches the AI parser"""
+    parsed = match_trivial_intent(text)
+    if parsed:
+        return parsed
+    
+    # Only accept regex matches covering the whole message, so extra
+    # recipients or descriptions are never silently dropped
+    match = _SEND_PATTERN.fullmatch(text)
+    if match:
+        # Use the full match itself: its loose amount group can swallow
+        # "5 ALGO to <ADDR> and 3", which then fails to parse as a number
+        return _send_intent_from_match(match)
+    
+    if any(pattern.fullmatch(text) for pattern in _NFT_PATTERNS):
+        parsed = parse_nft_command_fallback(text)
+        name = parsed and parsed['parameters']['name']
+        if name and name.lower() not in _NFT_NAME_KEYWORDS and not _NFT_NAME_CLAUSE_RE.search(name):
+            return parsed
+    
+    if any(pattern.fullmatch(text) for pattern in _OPT_IN_PATTERNS + _OPT_OUT_PATTERNS):
+        return parse_opt_command_fallback(text)
+    
+    return None
+
+async def parse_user_intent(text):
+    """Parse locally when possible, calling the AI parser only for free-form text"""
+    parsed = fast_parse(text)
+    if parsed:
+        return parsed
+    return await get_intent_parser().parse(text)
+
 async def start(update: Update, context: CallbackContext):
     """Welcome message for all users"""
     user = update.effective_user
@@ -395,6 +651,10 @@ async def start(update: Update, context: CallbackContext):
         reply_markup=reply_markup
     )
 
+def has_intent_keyword(text):
+    """Cheap pre-filter: True if the message mentions any intent keyword"""
+    return not _INTENT_KEYWORDS.isdisjoint(_WORD_RE.findall(text.lower()))
+
 async def handle_message(update: Update, context: CallbackContext):
     """Main message handler with comprehensive security"""
     user = update.effective_user
@@ -406,13 +666,18 @@ async def handle_message(update: Update, context: CallbackContext):
         await update.message.reply_text("❌ Invalid input received.")
         return
     
+    # Chit-chat skips rate limiting and parsing; passwords/mnemonics mid-conversation are never gated
+    current_state = context.user_data.get('state')
+    if not current_state and not has_intent_keyword(user_input):
+        await update.message.reply_text(HELP_MESSAGE)
+        return
+    
     # Rate limiting check
     if not check_user_rate_limit(user_id):
         await update.message.reply_text("⏱️ You're sending requests too quickly. Please wait a moment and try again.")
         return
     
     # Check conversation state
-    current_state = context.user_data.get('state')
     if current_state:
         return await handle_conversation_state(update, context)
     
@@ -422,8 +687,7 @@ async def handle_message(update: Update, context: CallbackContext):
     # Parse intent
     parsed = None
     try:
-        intent_parser = AIIntentParser()
-        parsed = intent_parser.parse(user_input)
+        parsed = await parse_user_intent(user_input)
     except Exception as e:
         logger.error(f"AI parsing failed for user {user_id}: {e}")
     
@@ -434,14 +698,7 @@ async def handle_message(update: Update, context: CallbackContext):
             parsed = parse_send_command_fallback(user_input)
     
     if not parsed:
-        await update.message.reply_text(
-            "❌ I didn't understand that command.\n\n"
-            "Try:\n"
-            "• 'Create a new wallet'\n"
-            "• 'Send 5 ALGO to [ADDRESS]'\n"
-            "• 'Create NFT named Dragon'\n"
-            "• 'Check my balance'"
-        )
+        await update.message.reply_text(HELP_MESSAGE)
         return
     
     intent = parsed['intent']
@@ -538,15 +795,13 @@ async def handle_wallet_creation_password(update: Update, context: CallbackConte
         return
     
     try:
-        wallet_data = create_wallet(password)
-        sessions = load_sessions()
-        sessions[str(user_id)] = {
+        wallet_data = await asyncio.to_thread(create_wallet, password)
+        await run_session_store(set_user_session, user_id, {
             "address": wallet_data["address"],
             "encrypted_mnemonic": wallet_data["encrypted_mnemonic"],
             "created_at": datetime.now().isoformat(),
             "last_activity": datetime.now().isoformat()
-        }
-        save_sessions(sessions)
+        })
         
         log_security_event(user_id, "WALLET_CREATED", f"Address: {wallet_data['address']}")
         
@@ -611,15 +866,13 @@ async def handle_connection_password(update: Update, context: CallbackContext, p
     await delete_message_safely(update, context)
     
     try:
-        wallet_data = connect_wallet(mnemonic, password)
-        sessions = load_sessions()
-        sessions[str(user_id)] = {
+        wallet_data = await asyncio.to_thread(connect_wallet, mnemonic, password)
+        await run_session_store(set_user_session, user_id, {
             "address": wallet_data["address"],
             "encrypted_mnemonic": wallet_data["encrypted_mnemonic"],
             "connected_at": datetime.now().isoformat(),
             "last_activity": datetime.now().isoformat()
-        }
-        save_sessions(sessions)
+        })
         
         log_security_event(user_id, "WALLET_CONNECTED", f"Address: {wallet_data['address']}")
         
@@ -641,12 +894,12 @@ async def handle_send_transaction(update: Update, context: CallbackContext, para
     user_id = update.effective_user.id
     
     # Validate session
-    if not validate_session(user_id):
+    if not await run_session_store(validate_session, user_id):
         await update.message.reply_text("❌ Please connect a wallet first!")
         return
     
     # Check transaction rate limit
-    if not check_user_rate_limit(user_id, "transaction"):
+    if not await run_session_store(check_user_rate_limit, user_id, "transaction"):
         await update.message.reply_text("⏱️ Transaction rate limit exceeded. Please wait before sending another transaction.")
         return
     
@@ -665,12 +918,12 @@ async def handle_send_transaction(update: Update, context: CallbackContext, para
         await update.message.reply_text("❌ Invalid amount. Must be between 0 and 1,000,000 ALGO.")
         return
     
-    sessions = load_sessions()
-    user_session = sessions.get(str(user_id), {})
+    user_session = await run_session_store(get_user_session, user_id) or {}
     
     try:
         algod_client = get_algod_client()
-        result = build_and_send_transaction(
+        result = await asyncio.to_thread(
+            build_and_send_transaction,
             sender=user_session["address"],
             recipient=params['recipient'],
             amount=params['amount'],
@@ -707,12 +960,12 @@ async def handle_multi_send_transaction(update: Update, context: CallbackContext
     user_id = update.effective_user.id
     
     # Validate session
-    if not validate_session(user_id):
+    if not await run_session_store(validate_session, user_id):
         await update.message.reply_text("❌ Please connect a wallet first!")
         return
     
     # Check transaction rate limit
-    if not check_user_rate_limit(user_id, "transaction"):
+    if not await run_session_store(check_user_rate_limit, user_id, "transaction"):
         await update.message.reply_text("⏱️ Transaction rate limit exceeded.")
         return
     
@@ -735,12 +988,12 @@ async def handle_multi_send_transaction(update: Update, context: CallbackContext
             await update.message.reply_text(f"❌ Invalid amount for recipient #{i+1}")
             return
     
-    sessions = load_sessions()
-    user_session = sessions.get(str(user_id), {})
+    user_session = await run_session_store(get_user_session, user_id) or {}
     
     try:
         algod_client = get_algod_client()
-        result = build_and_send_multi_transaction(
+        result = await asyncio.to_thread(
+            build_and_send_multi_transaction,
             sender=user_session["address"],
             recipients=recipients,
             algod_client=algod_client,
@@ -802,15 +1055,15 @@ async def handle_transaction_password(update: Update, context: CallbackContext,
 
         # Handle different transaction types
         if transaction_type == 'opt_in':
-            signed_txn = sign_transaction(pending_txn, password=password, frontend='telegram')
-            txid = algod_client.send_transaction(signed_txn)
+            signed_txn = await asyncio.to_thread(sign_transaction, pending_txn, password=password, frontend='telegram')
+            txid = await asyncio.to_thread(algod_client.send_transaction, signed_txn)
             log_security_event(user_id, "ASSET_OPT_IN", f"Asset: {asset_id}, TxID: {txid}")
             await update.message.reply_text(f"✅ Opt-in successful! TxID: `{txid}`", parse_mode="Markdown")
             
         elif transaction_type == 'opt_out':
             # Validation logic here...
-            signed_txn = sign_transaction(pending_txn, password=password, frontend='telegram')
-            txid = algod_client.send_transaction(signed_txn)
+            signed_txn = await asyncio.to_thread(sign_transaction, pending_txn, password=password, frontend='telegram')
+            txid = await asyncio.to_thread(algod_client.send_transaction, signed_txn)
             log_security_event(user_id, "ASSET_OPT_OUT", f"Asset: {asset_id}, TxID: {txid}")
             await update.message.reply_text(
                 f"✅ Opt-out successful!\n"
@@ -822,10 +1075,10 @@ async def handle_transaction_password(update: Update, context: CallbackContext,
         elif transaction_type == 'multi_send':
             signed_txns = []
             for txn in pending_txns:
-                signed_txn = sign_transaction(txn, password=password, frontend='telegram')
+                signed_txn = await asyncio.to_thread(sign_transaction, txn, password=password, frontend='telegram')
                 signed_txns.append(signed_txn)
             
-            txid = algod_client.send_transactions(signed_txns)
+            txid = await asyncio.to_thread(algod_client.send_transactions, signed_txns)
             total_amount = sum(r['amount'] for r in recipients)
             log_security_event(user_id, "MULTI_SEND_COMPLETED", f"Recipients: {len(recipients)}, Total: {total_amount} ALGO")
             
@@ -839,11 +1092,11 @@ async def handle_transaction_password(update: Update, context: CallbackContext,
             
         elif transaction_type == 'nft':
             # Sign and send NFT creation transaction
-            signed_txn = sign_transaction(pending_txn, password=password, frontend='telegram')
-            txid = algod_client.send_transaction(signed_txn)
+            signed_txn = await asyncio.to_thread(sign_transaction, pending_txn, password=password, frontend='telegram')
+            txid = await asyncio.to_thread(algod_client.send_transaction, signed_txn)
             
             # Try to get asset ID (this might fail but transaction succeeded)
-            asset_id = confirm_and_get_asset_id(algod_client, txid)
+            asset_id = await asyncio.to_thread(confirm_and_get_asset_id, algod_client, txid)
             
             log_security_event(user_id, "NFT_CREATED", f"TxID: {txid}, Asset ID: {asset_id}")
             
@@ -867,8 +1120,8 @@ async def handle_transaction_password(update: Update, context: CallbackContext,
         elif transaction_type in ['nft_transfer', 'nft_multi_transfer']:
             # Handle NFT transfers (existing logic)
             if transaction_type == 'nft_transfer':
-                signed_txn = sign_transaction(pending_txn, password=password, frontend='telegram')
-                txid = algod_client.send_transaction(signed_txn)
+                signed_txn = await asyncio.to_thread(sign_transaction, pending_txn, password=password, frontend='telegram')
+                txid = await asyncio.to_thread(algod_client.send_transaction, signed_txn)
                 await update.message.reply_text(
                     f"✅ **NFT Transferred!**\n"
                     f"📄 TxID: `{txid}`",
@@ -877,9 +1130,9 @@ async def handle_transaction_password(update: Update, context: CallbackContext,
             else:  # nft_multi_transfer
                 signed_txns = []
                 for txn in pending_txns:
-                    signed_txn = sign_transaction(txn, password=password, frontend='telegram')
+                    signed_txn = await asyncio.to_thread(sign_transaction, txn, password=password, frontend='telegram')
                     signed_txns.append(signed_txn)
-                txid = algod_client.send_transactions(signed_txns)
+                txid = await asyncio.to_thread(algod_client.send_transactions, signed_txns)
                 await update.message.reply_text(
                     f"✅ **Multi-NFT Transfer Complete!**\n"
                     f"📄 Group TxID: `{txid}`",
@@ -887,8 +1140,8 @@ async def handle_transaction_password(update: Update, context: CallbackContext,
                 )
         else:
             # Default case for regular ALGO transactions
-            signed_txn = sign_transaction(pending_txn, password=password, frontend='telegram')
-            txid = algod_client.send_transaction(signed_txn)
+            signed_txn = await asyncio.to_thread(sign_transaction, pending_txn, password=password, frontend='telegram')
+            txid = await asyncio.to_thread(algod_client.send_transaction, signed_txn)
             log_security_event(user_id, "TRANSACTION_SIGNED", f"TxID: {txid}")
             await update.message.reply_text(
                 f"✅ **Transaction Successful!**\n"
@@ -929,12 +1182,12 @@ async def handle_transaction_password(update: Update, context: CallbackContext,
 async def handle_nft_creation(update: Update, context: CallbackContext, params: dict):
     """Handle NFT creation with video/image support and enhanced security"""
     user_id = update.effective_user.id
-    sessions = load_sessions()
     
     # Validate session and parameters
-    if not validate_session(user_id):
+    if not await run_session_store(validate_session, user_id):
         await update.message.reply_text("❌ Please connect a wallet first!")
         return
+    user_session = await run_session_store(get_user_session, user_id) or {}
 
     if 'name' not in params or not params['name']:
         await update.message.reply_text("❌ Missing NFT name. Example: 'Create NFT named Dragon'")
@@ -963,7 +1216,7 @@ async def handle_nft_creation(update: Update, context: CallbackContext, params:
         if media_path:
             try:
                 # Upload to IPFS
-                media_url = upload_to_ipfs(media_path)
+                media_url = await asyncio.to_thread(upload_to_ipfs, media_path)
                 
                 # Cleanup temp file
                 os.unlink(media_path)
@@ -984,18 +1237,19 @@ async def handle_nft_creation(update: Update, context: CallbackContext, params:
             "description": sanitize_input(params.get('description', "")),
             "media_type": media_type,
             "media_url": media_url,
-            "creator": sessions[str(user_id)]["address"]
+            "creator": user_session["address"]
         }
 
         # Create NFT transaction
         algod_client = get_algod_client()
-        result = create_nft(
+        result = await asyncio.to_thread(
+            create_nft,
             name=nft_name,
             unit_name=generate_unit_name(nft_name),
             total_supply=params.get('supply', 1),
             description=metadata["description"],
             algod_client=algod_client,
-            sender=sessions[str(user_id)]["address"],
+            sender=user_session["address"],
             frontend='telegram',
             url=media_url
         )
@@ -1066,8 +1320,7 @@ async def handle_photo(update: Update, context: CallbackContext):
             sanitized_caption = sanitize_input(caption)
             print(f"DEBUG: Sanitized caption: '{sanitized_caption}'")  # Debug log
             
-            intent_parser = AIIntentParser()
-            parsed = intent_parser.parse(sanitized_caption)
+            parsed = await parse_user_intent(sanitized_caption)
             print(f"DEBUG: AI parsed result: {parsed}")  # Debug log
             
             # If caption contains valid NFT intent, process immediately
@@ -1112,13 +1365,12 @@ async def handle_image_state(update: Update, context: CallbackContext):
     user_input = sanitize_input(update.message.text)
     user_id = update.effective_user.id
     try:
-        intent_parser = AIIntentParser()
-        parsed = intent_parser.parse(user_input)
+        parsed = await parse_user_intent(user_input)
         if not parsed or parsed.get('intent') != 'create_nft':
             await update.message.reply_text("❌ Invalid NFT command")
             return ConversationHandler.END
         image_path = context.user_data['nft_image']
-        ipfs_url = upload_to_ipfs(image_path)
+        ipfs_url = await asyncio.to_thread(upload_to_ipfs, image_path)
         os.unlink(image_path)
         params = parsed.get('parameters', {})
         params['image_url'] = ipfs_url
@@ -1142,8 +1394,7 @@ async def handle_video(update: Update, context: CallbackContext):
         if caption:
             # Try to parse the caption as an NFT intent
             sanitized_caption = sanitize_input(caption)
-            intent_parser = AIIntentParser()
-            parsed = intent_parser.parse(sanitized_caption)
+            parsed = await parse_user_intent(sanitized_caption)
             if parsed and parsed.get('intent') == 'create_nft':
                 params = parsed.get('parameters', {})
                 params['video_path'] = context.user_data['nft_video']
@@ -1163,10 +1414,10 @@ async def handle_video(update: Update, context: CallbackContext):
     
 async def handle_send_nft(update: Update, context: CallbackContext, params: dict):
     user_id = update.effective_user.id
-    sessions = load_sessions()
+    user_session = await run_session_store(get_user_session, user_id)
     
     # Validate session
-    if str(user_id) not in sessions:
+    if not user_session:
         await update.message.reply_text("❌ Connect wallet first!")
         return
         
@@ -1184,8 +1435,9 @@ async def handle_send_nft(update: Update, context: CallbackContext, params: dict
             return
             
         algod_client = get_algod_client()
-        result = send_nft(
-            sender=sessions[str(user_id)]["address"],
+        result = await asyncio.to_thread(
+            send_nft,
+            sender=user_session["address"],
             asset_id=asset_id,
             recipient=recipient,
             algod_client=algod_client,
@@ -1215,9 +1467,9 @@ async def handle_send_nft(update: Update, context: CallbackContext, params: dict
 
 async def handle_send_nft_multi(update: Update, context: CallbackContext, params: dict):
     user_id = update.effective_user.id
-    sessions = load_sessions()
+    user_session = await run_session_store(get_user_session, user_id)
     
-    if str(user_id) not in sessions:
+    if not user_session:
         await update.message.reply_text("❌ Connect wallet first!")
         return
         
@@ -1238,8 +1490,9 @@ async def handle_send_nft_multi(update: Update, context: CallbackContext, params
             return
             
         algod_client = get_algod_client()
-        result = send_nft_multi(
-            sender=sessions[str(user_id)]["address"],
+        result = await asyncio.to_thread(
+            send_nft_multi,
+            sender=user_session["address"],
             asset_id=asset_id,
             recipients=valid_recipients,
             algod_client=algod_client,
@@ -1279,14 +1532,13 @@ async def handle_send_nft_multi(update: Update, context: CallbackContext, params
 async def debug_nft_transfer(update: Update, context: CallbackContext, asset_id: int, recipient: str):
     """Debug NFT transfer issues"""
     user_id = update.effective_user.id
-    sessions = load_sessions()
-    user_address = sessions[str(user_id)]["address"]
+    user_address = (await run_session_store(get_user_session, user_id))["address"]
     
     try:
         algod_client = get_algod_client()
         
         # Check sender account
-        sender_info = algod_client.account_info(user_address)
+        sender_info = await asyncio.to_thread(algod_client.account_info, user_address)
         sender_owns = False
         for asset in sender_info.get('assets', []):
             if asset['asset-id'] == asset_id:
@@ -1295,14 +1547,14 @@ async def debug_nft_transfer(update: Update, context: CallbackContext, asset_id:
         
         # Check recipient account
         try:
-            recipient_info = algod_client.account_info(recipient)
+            recipient_info = await asyncio.to_thread(algod_client.account_info, recipient)
             recipient_opted_in = any(asset['asset-id'] == asset_id for asset in recipient_info.get('assets', []))
         except:
             recipient_opted_in = False
         
         # Check asset info
         try:
-            asset_info = algod_client.asset_info(asset_id)
+            asset_info = await asyncio.to_thread(algod_client.asset_info, asset_id)
             asset_exists = True
         except:
             asset_exists = False
@@ -1325,11 +1577,10 @@ async def debug_nft_transfer(update: Update, context: CallbackContext, asset_id:
 
 async def handle_opt_in(update: Update, context: CallbackContext, params: dict):
     user_id = update.effective_user.id
-    if not validate_session(user_id):
+    if not await run_session_store(validate_session, user_id):
         await update.message.reply_text("❌ Please connect a wallet first!")
         return
-    sessions = load_sessions()
-    user_session = sessions.get(str(user_id), {})
+    user_session = await run_session_store(get_user_session, user_id) or {}
     try:
         asset_id = int(params['asset_id'])
     except Exception:
@@ -1337,7 +1588,8 @@ async def handle_opt_in(update: Update, context: CallbackContext, params: dict):
         return
     try:
         algod_client = get_algod_client()
-        result = opt_in_to_asset(
+        result = await asyncio.to_thread(
+            opt_in_to_asset,
             sender=user_session["address"],
             asset_id=asset_id,
             algod_client=algod_client,
@@ -1361,11 +1613,10 @@ async def handle_opt_in(update: Update, context: CallbackContext, params: dict):
 
 async def handle_opt_out(update: Update, context: CallbackContext, params: dict):
     user_id = update.effective_user.id
-    if not validate_session(user_id):
+    if not await run_session_store(validate_session, user_id):
         await update.message.reply_text("❌ Please connect a wallet first!")
         return
-    sessions = load_sessions()
-    user_session = sessions.get(str(user_id), {})
+    user_session = await run_session_store(get_user_session, user_id) or {}
     try:
         asset_id = int(params['asset_id'])
     except Exception:
@@ -1373,7 +1624,8 @@ async def handle_opt_out(update: Update, context: CallbackContext, params: dict)
         return
     try:
         algod_client = get_algod_client()
-        result = opt_out_of_asset(
+        result = await asyncio.to_thread(
+            opt_out_of_asset,
             sender=user_session["address"],
             asset_id=asset_id,
             algod_client=algod_client,
@@ -1400,16 +1652,15 @@ async def handle_balance_check(update: Update, context: CallbackContext):
     """Check wallet balance securely"""
     user_id = update.effective_user.id
     
-    if not validate_session(user_id):
+    if not await run_session_store(validate_session, user_id):
         await update.message.reply_text("❌ Please connect a wallet first!")
         return
     
-    sessions = load_sessions()
-    user_session = sessions.get(str(user_id), {})
+    user_session = await run_session_store(get_user_session, user_id) or {}
     
     try:
         algod_client = get_algod_client()
-        account_info = algod_client.account_info(user_session["address"])
+        account_info = await asyncio.to_thread(algod_client.account_info, user_session["address"])
         balance = account_info.get("amount", 0) / 1_000_000
         
         log_security_event(user_id, "BALANCE_CHECKED")
@@ -1426,12 +1677,9 @@ async def handle_balance_check(update: Update, context: CallbackContext):
 async def handle_disconnect(update: Update, context: CallbackContext):
     """Disconnect wallet securely"""
     user_id = update.effective_user.id
-    sessions = load_sessions()
     
-    if str(user_id) in sessions:
+    if await run_session_store(delete_user_session, user_id):
         log_security_event(user_id, "WALLET_DISCONNECTED")
-        del sessions[str(user_id)]
-        save_sessions(sessions)
     
     context.user_data.clear()
     await update.message.reply_text("✅ Wallet disconnected securely")
@@ -1456,46 +1704,56 @@ async def cancel(update: Update, context: CallbackContext):
 
 def main():
     """Start the bot with security logging"""
-    if not BOT_TOKEN:
-        logger.error("TELEGRAM_BOT_TOKEN not found in environment variables")
-        return
+    log_listener.start()
+    security_log_listener.start()
+    try:
+        if not BOT_TOKEN:
+            logger.error("TELEGRAM_BOT_TOKEN not found in environment variables")
+            return
     
-    logger.info("Starting Algo-Intent Bot with enhanced security")
-    security_logger.info("Bot started with public access and message security enabled")
-    
-    application = ApplicationBuilder().token(BOT_TOKEN).build()
-    
-    # Add cancel handler first (highest priority)
-    application.add_handler(CommandHandler("cancel", cancel))
-    
-    # Add start handler
-    application.add_handler(CommandHandler("start", start))
-    
-    # Add media handlers
-    application.add_handler(MessageHandler(filters.PHOTO, handle_photo))
-    application.add_handler(MessageHandler(filters.VIDEO, handle_video))
-    
-    # Conversation handler with proper fallbacks
-    conversation_handler = ConversationHandler(
-        entry_points=[MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)],
-        states={
-            IMAGE_HANDLING: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_image_state)],
-            WALLET_CONNECTION: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_mnemonic_input)],
-            CREATING_WALLET: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_wallet_creation_password)],
-            'transaction_password': [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_conversation_state)]
-        },
-        fallbacks=[
-            CommandHandler("cancel", cancel),          # /cancel exits conversation
-            CommandHandler("start", start),            # /start exits conversation  
-            MessageHandler(filters.COMMAND, cancel)   # ANY command exits conversation
-        ],
-        allow_reentry=True
-    )
+        logger.info("Starting Algo-Intent Bot with enhanced security")
+        security_logger.info("Bot started with public access and message security enabled")
+    
+        application = ApplicationBuilder().token(BOT_TOKEN).build()
+    
+        if redis_client is None:
+            application.job_queue.run_repeating(flush_sessions_job, interval=SESSION_FLUSH_INTERVAL_SECONDS)
+    
+        # Add cancel handler first (highest priority)
+        application.add_handler(CommandHandler("cancel", cancel))
+    
+        # Add start handler
+        application.add_handler(CommandHandler("start", start))
+    
+        # Add media handlers
+        application.add_handler(MessageHandler(filters.PHOTO, handle_photo))
+        application.add_handler(MessageHandler(filters.VIDEO, handle_video))
+    
+        # Conversation handler with proper fallbacks
+        conversation_handler = ConversationHandler(
+            entry_points=[MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)],
+            states={
+                IMAGE_HANDLING: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_image_state)],
+                WALLET_CONNECTION: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_mnemonic_input)],
+                CREATING_WALLET: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_wallet_creation_password)],
+                'transaction_password': [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_conversation_state)]
+            },
+            fallbacks=[
+                CommandHandler("cancel", cancel),          # /cancel exits conversation
+                CommandHandler("start", start),            # /start exits conversation  
+                MessageHandler(filters.COMMAND, cancel)   # ANY command exits conversation
+            ],
+            allow_reentry=True
+        )
     
-    application.add_handler(conversation_handler)
+        application.add_handler(conversation_handler)
     
-    logger.info("🤖 Secure Bot started! Ready for public use with message security.")
-    application.run_polling()
+        logger.info("🤖 Secure Bot started! Ready for public use with message security.")
+        application.run_polling()
+    finally:
+        flush_sessions()
+        security_log_listener.stop()
+        log_listener.stop()
 
 # Add this cancel function before main()
 async def cancel(update: Update, context: CallbackContext):
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from ai_intent import AIIntentParser
+
+
+class FakeCompletions:
+    """Stands in for client.chat.completions, replaying canned replies"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        content = self.replies.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def make_parser(*replies):
+    completions = FakeCompletions(*replies)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return AIIntentParser(client=client), completions
+
+
+class ParseCacheTests(unittest.TestCase):
+    def test_unparseable_reply_is_retried(self):
+        parser, completions = make_parser(
+            "sorry, cannot help",
+            '{"intent": "create_nft", "parameters": {"name": "Dragon"}}',
+        )
+        self.assertEqual(asyncio.run(parser.parse("mint a dragon")), {"intent": "unknown"})
+        self.assertEqual(
+            asyncio.run(parser.parse("mint a dragon")),
+            {"intent": "create_nft", "parameters": {"name": "Dragon"}}
+        )
+        self.assertEqual(completions.calls, 2)
+
+    def test_every_unparseable_reply_is_logged(self):
+        parser, completions = make_parser("sorry", "still sorry")
+        with self.assertLogs("ai_intent", level="WARNING") as logs:
+            asyncio.run(parser.parse("mint a dragon"))
+            asyncio.run(parser.parse("mint a dragon"))
+        self.assertEqual(len(logs.records), 2)
+
+    def test_unknown_intent_from_the_model_is_cached(self):
+        parser, completions = make_parser('{"intent": "unknown"}')
+        self.assertEqual(asyncio.run(parser.parse("tell me a joke")), {"intent": "unknown"})
+        self.assertEqual(asyncio.run(parser.parse("tell me a joke")), {"intent": "unknown"})
+        self.assertEqual(completions.calls, 1)
+
+    def test_parsed_reply_is_cached(self):
+        parser, completions = make_parser('{"intent": "create_nft", "parameters": {"name": "Dragon"}}')
+        first = asyncio.run(parser.parse("mint a dragon"))
+        first["parameters"]["name"] = "changed by caller"
+        self.assertEqual(
+            asyncio.run(parser.parse("mint  a dragon ")),
+            {"intent": "create_nft", "parameters": {"name": "Dragon"}}
+        )
+        self.assertEqual(completions.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
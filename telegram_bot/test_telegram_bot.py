@@ -0,0 +1,84 @@
+import asyncio
+import base64
+import hashlib
+import os
+import unittest
+from unittest import mock
+
+try:
+    import telegram_bot
+except ImportError:  # python-telegram-bot / py-algorand-sdk not installed
+    telegram_bot = None
+
+
+def make_address():
+    """Random Algorand address with a valid checksum"""
+    public_key = os.urandom(32)
+    checksum = hashlib.new('sha512_256', public_key).digest()[-4:]
+    return base64.b32encode(public_key + checksum).decode().rstrip('=')
+
+
+@unittest.skipIf(telegram_bot is None, "bot dependencies are not installed")
+class SanitizeInputTests(unittest.TestCase):
+    def test_removal_cannot_join_fragments_into_a_blocked_pattern(self):
+        cases = {
+            "java<script>x</script>script:alert(1)": "alert(1)",
+            "dat<script></script>a:text/html": "text/html",
+            "onlo<script></script>ad=x": "x",
+            "javajavascript:script:alert(1)": "alert(1)",
+        }
+        for text, expected in cases.items():
+            self.assertEqual(telegram_bot.sanitize_input(text), expected, text)
+
+    def test_clean_input_is_unchanged(self):
+        self.assertEqual(telegram_bot.sanitize_input("  Send 5 ALGO  "), "Send 5 ALGO")
+
+
+@unittest.skipIf(telegram_bot is None, "bot dependencies are not installed")
+class FastParseTests(unittest.TestCase):
+    def fast_parse(self, text):
+        return telegram_bot.fast_parse(telegram_bot.sanitize_input(text))
+
+    def test_single_send_is_parsed_locally(self):
+        address = make_address()
+        self.assertEqual(
+            self.fast_parse(f"Send 5 ALGO to {address}"),
+            {'intent': 'send_algo', 'parameters': {'amount': 5.0, 'recipient': address}}
+        )
+
+    def test_multi_recipient_send_is_left_to_the_ai_parser(self):
+        first, second, third = make_address(), make_address(), make_address()
+        self.assertIsNone(self.fast_parse(f"Send 5 ALGO to {first} and 3 ALGO to {second}"))
+        self.assertIsNone(self.fast_parse(
+            f"Send 5 ALGO to {first}, 3 ALGO to {second} and 1 ALGO to {third}"
+        ))
+
+    def test_nft_without_a_name_is_left_to_the_ai_parser(self):
+        for text in ("create nft named", "create nft called", "create nft name"):
+            self.assertIsNone(self.fast_parse(text), text)
+
+    def test_named_nft_is_parsed_locally(self):
+        self.assertEqual(
+            self.fast_parse("create nft named Dragon"),
+            {'intent': 'create_nft', 'parameters': {'name': 'Dragon', 'supply': 1}}
+        )
+
+
+@unittest.skipIf(telegram_bot is None, "bot dependencies are not installed")
+class ParseUserIntentTests(unittest.TestCase):
+    def test_multi_recipient_caption_reaches_the_ai_parser(self):
+        # Captions and image-state text share parse_user_intent with plain messages
+        first, second = make_address(), make_address()
+        caption = telegram_bot.sanitize_input(f"Send 5 ALGO to {first} and 3 ALGO to {second}")
+        ai_result = {'intent': 'send_algo_multi', 'parameters': {'recipients': [
+            {'address': first, 'amount': 5.0}, {'address': second, 'amount': 3.0}
+        ]}}
+        parser = mock.Mock()
+        parser.parse = mock.AsyncMock(return_value=ai_result)
+        with mock.patch.object(telegram_bot, 'get_intent_parser', return_value=parser):
+            self.assertEqual(asyncio.run(telegram_bot.parse_user_intent(caption)), ai_result)
+        parser.parse.assert_awaited_once_with(caption)
+
+
+if __name__ == '__main__':
+    unittest.main()
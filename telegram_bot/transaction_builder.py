@@ -1,5 +1,4 @@
 
-from algosdk.transaction import PaymentTxn, AssetConfigTxn, AssetTransferTxn, wait_for_confirmation, assign_group_id
 from utils import validate_address, check_account_balance
 from wallet import sign_transaction
 
@@ -14,6 +13,7 @@ def build_and_send_transaction(sender, recipient, amount, algod_client, password
     Build and send a transaction using the connected wallet
     frontend: 'cli' or 'telegram'
     """
+    from algosdk.transaction import PaymentTxn
     if not validate_address(recipient):
         raise TransactionError("❌ Invalid recipient address format.")
     if not sender:
@@ -70,6 +70,7 @@ def build_and_send_multi_transaction(sender, recipients, algod_client, password=
     Build and send atomic transfer to multiple recipients
     recipients: [{"address": "...", "amount": 5.0}, ...]
     """
+    from algosdk.transaction import PaymentTxn, assign_group_id
     if not recipients or len(recipients) < 2:
         raise TransactionError("❌ Multi-recipient transfer requires at least 2 recipients.")
     
@@ -137,6 +138,7 @@ def build_and_send_multi_transaction(sender, recipients, algod_client, password=
 
 def create_nft(name, unit_name, total_supply, description, algod_client, sender, password=None, frontend='cli', url=None):
     """Create an NFT using the connected wallet"""
+    from algosdk.transaction import AssetConfigTxn, wait_for_confirmation
     if not name:
         raise NFTCreationError("❌ NFT name is required.")
     if not sender:
@@ -189,6 +191,7 @@ def create_nft(name, unit_name, total_supply, description, algod_client, sender,
 
 def send_nft(sender, asset_id, recipient, algod_client, password=None, frontend='cli'):
     """Transfer NFT to single recipient"""
+    from algosdk.transaction import AssetTransferTxn
     try:
         params = algod_client.suggested_params()
         txn = AssetTransferTxn(
@@ -219,6 +222,7 @@ def send_nft(sender, asset_id, recipient, algod_client, password=None, frontend=
 
 def send_nft_multi(sender, asset_id, recipients, algod_client, password=None, frontend='cli'):
     """Atomic transfer to multiple recipients"""
+    from algosdk.transaction import AssetTransferTxn, assign_group_id
     try:
         params = algod_client.suggested_params()
         txns = []
@@ -262,6 +266,7 @@ def send_nft_multi(sender, asset_id, recipients, algod_client, password=None, fr
 
 def confirm_and_get_asset_id(algod_client, txid):
     """Get asset ID from transaction ID (for NFT creation)"""
+    from algosdk.transaction import wait_for_confirmation
     try:
         confirmed_txn = wait_for_confirmation(algod_client, txid, 4)
         return confirmed_txn['asset-index']
@@ -272,6 +277,7 @@ def opt_in_to_asset(sender, asset_id, algod_client, password=None, frontend='cli
     """
     Opt-in to an Algorand ASA/NFT.
     """
+    from algosdk.transaction import AssetTransferTxn
     params = algod_client.suggested_params()
     txn = AssetTransferTxn(
         sender=sender,
@@ -294,6 +300,7 @@ def opt_out_of_asset(sender, asset_id, algod_client, password=None, frontend='cl
     """
     Opt-out of an Algorand ASA/NFT (must have zero balance).
     """
+    from algosdk.transaction import AssetTransferTxn
     params = algod_client.suggested_params()
     txn = AssetTransferTxn(
         sender=sender,
@@ -1,8 +1,7 @@
 import os
 import re
+from functools import lru_cache
 from dotenv import load_dotenv
-from algosdk.v2client import algod
-from algosdk.encoding import is_valid_address
 import ssl
 
 # Disable SSL verification (not recommended for production)
@@ -15,15 +14,31 @@ ALGOD_ADDRESS = os.getenv('ALGOD_ADDRESS', 'https://testnet-api.algonode.cloud')
 ALGOD_PORT = os.getenv('ALGOD_PORT', '443')
 ALGOD_TOKEN = os.getenv('ALGOD_TOKEN', 'a' * 64)
 
+@lru_cache(maxsize=1)
 def get_algod_client():
+    """Return the shared AlgodClient (built once per process)"""
     try:
-        return algod.AlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
-    except NameError:
+        from algosdk.v2client import algod
+    except ImportError:
         raise ImportError("algosdk is required for this function. Install with: pip install py-algorand-sdk")
+    return algod.AlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
 
 def validate_address(address):
+    from algosdk.encoding import is_valid_address
     return is_valid_address(address)
 
+# Word values used by text_to_number ('point' marks the decimal separator)
+NUMBER_WORDS = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+    'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14, 'fifteen': 15,
+    'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19, 'twenty': 20,
+    'thirty': 30, 'forty': 40, 'fifty': 50, 'sixty': 60, 'seventy': 70, 'eighty': 80, 'ninety': 90,
+    'hundred': 100, 'thousand': 1000, 'million': 1000000, 'billion': 1000000000,
+    'point': '.'
+}
+NUMBER_MULTIPLIERS = frozenset((100, 1000, 1000000, 1000000000))
+
 def text_to_number(text):
     """
     Convert text representation of numbers to actual numbers
@@ -31,17 +46,6 @@ def text_to_number(text):
     """
     if not text or not isinstance(text, str):
         return None
-        
-    # Handle decimal numbers with 'point'
-    numbers = {
-        'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
-        'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
-        'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14, 'fifteen': 15,
-        'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19, 'twenty': 20,
-        'thirty': 30, 'forty': 40, 'fifty': 50, 'sixty': 60, 'seventy': 70, 'eighty': 80, 'ninety': 90,
-        'hundred': 100, 'thousand': 1000, 'million': 1000000, 'billion': 1000000000,
-        'point': '.'  # For decimal handling
-    }
     
     # Handle hyphenated numbers like "twenty-five"
     text = text.lower().replace('-', ' ')
@@ -50,25 +54,29 @@ def text_to_number(text):
     text = text.replace(' and ', ' ')
     
     parts = text.split()
+    # Resolve every word up front; any unknown word means this isn't a number
+    values = [NUMBER_WORDS.get(part) for part in parts]
+    if None in values:
+        return None
+
     total = 0
     current = 0
     decimal_part = False
     decimal_str = ''
+    last_index = len(values) - 1
 
-    for part in parts:
-        if part not in numbers:
-            return None
-        val = numbers[part]
+    for i, val in enumerate(values):
         if val == '.':
             decimal_part = True
             continue
         if not decimal_part:
-            if val in [100, 1000, 1000000, 1000000000]:
+            if val in NUMBER_MULTIPLIERS:
                 if current == 0:
                     current = 1
                 current *= val
                 # If this is the last multiplier in a sequence, add to total
-                if parts.index(part) == len(parts) - 1 or numbers[parts[parts.index(part) + 1]] < 100:
+                next_val = values[i + 1] if i < last_index else None
+                if next_val is None or next_val == '.' or next_val < 100:
                     total += current
                     current = 0
             else:
@@ -81,7 +89,7 @@ def text_to_number(text):
         try:
             decimal_value = float('0.' + decimal_str)
             total += decimal_value
-        except:
+        except ValueError:
             return None
     return total
 
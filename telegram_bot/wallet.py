@@ -1,6 +1,5 @@
 import os
 import json
-from algosdk import account, mnemonic
 import base64
 import getpass
 from cryptography.fernet import Fernet
@@ -32,6 +31,8 @@ class WalletManager:
     
     def create_wallet(self, password=None):
         """Create a new Algorand wallet and store it securely"""
+        from algosdk import account, mnemonic
+
         # Generate new account
         private_key, address = account.generate_account()
         passphrase = mnemonic.from_private_key(private_key)
@@ -70,6 +71,7 @@ class WalletManager:
         if not passphrase:
             passphrase = getpass.getpass("Enter your 25-word mnemonic phrase: ")
         
+        from algosdk import account, mnemonic
         try:
             # Validate mnemonic by deriving private key
             private_key = mnemonic.to_private_key(passphrase)
@@ -187,6 +189,7 @@ class WalletManager:
             decrypted_mnemonic = self._decrypt_data(wallet_data["encrypted_mnemonic"], password)
             
             # Get private key
+            from algosdk import mnemonic
             private_key = mnemonic.to_private_key(decrypted_mnemonic)
             
             # Sign transaction